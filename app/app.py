@@ -1,8 +1,12 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, g, request, jsonify, render_template, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
+import hmac
+import json
 import logging
 import os
 from config import Config
 from bot_handler import TechMartBot
+from profiler import ProfilerBusyError, profiler
 
 app = Flask(__name__)
 
@@ -13,9 +17,12 @@ logging.basicConfig(
 )
 
 # Initialize configuration and bot
+config = None
 try:
     config = Config()
     bot = TechMartBot(config)
+    # Reject oversized uploads before Werkzeug buffers every multipart part
+    app.config['MAX_CONTENT_LENGTH'] = config.MAX_UPLOAD_MB * 1024 * 1024
     logging.info("✅ TechMart Bot initialized successfully")
     logging.info(f"🌐 Environment: {config.ENVIRONMENT}")
     logging.info(f"🤖 OpenAI Endpoint: {config.AZURE_OPENAI_ENDPOINT[:50]}...")
@@ -23,6 +30,26 @@ except Exception as e:
     logging.error(f"❌ Failed to initialize bot: {e}")
     bot = None
 
+@app.before_request
+def tag_profiled_request():
+    """Attribute samples to the current route while a profile is running"""
+    if profiler.active:
+        g.profile_token = profiler.request_started(f"{request.method} {request.url_rule or '(unmatched)'}")
+
+@app.teardown_request
+def untag_profiled_request(exc):
+    token = g.pop('profile_token', None)
+    if token is not None:
+        profiler.request_finished(token)
+
+@app.errorhandler(413)
+def request_too_large(e):
+    """Keep oversized upload rejections in the API's JSON shape"""
+    return jsonify({
+        'success': False,
+        'error': f"Upload too large (max {app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)}MB)"
+    }), 413
+
 @app.route('/')
 def home():
     """Main chat interface"""
@@ -105,6 +132,76 @@ def image():
             'error': 'Sorry, I encountered an error processing your image.'
         }), 500
 
+@app.route('/api/images', methods=['POST'])
+def images():
+    """Handle multi-image uploads, analyzed concurrently
+    
+    Pass ``stream=true`` to receive newline-delimited JSON: one line per image
+    as it finishes, followed by a summary line with the merged suggestions.
+    """
+    try:
+        files = [f for f in request.files.getlist('images') if f and f.filename]
+        if not files:
+            return jsonify({'error': 'No images provided'}), 400
+        
+        user_id = request.form.get('user_id', 'anonymous')
+        
+        if not bot:
+            return jsonify({'error': 'Bot service not available'}), 503
+        
+        if len(files) > config.MAX_IMAGES_PER_REQUEST:
+            return jsonify({
+                'error': f'Too many images (max {config.MAX_IMAGES_PER_REQUEST})'
+            }), 400
+        
+        uploads = [(f.filename, f.read()) for f in files]
+        
+        if request.args.get('stream', 'false').lower() == 'true':
+            def generate():
+                # Runs after the 200 headers are sent, so failures must end the stream with an error line
+                results = []
+                recorded = False
+                try:
+                    for result in bot.iter_image_results(uploads):
+                        results.append(result)
+                        yield json.dumps({'type': 'image', **result}) + '\n'
+                    recorded = True
+                    summary = bot.summarize_image_results(user_id, results)
+                    yield json.dumps({'type': 'summary', 'success': True, 'user_id': user_id, **summary}) + '\n'
+                except Exception as e:
+                    logging.error(f"Multi-image streaming error: {e}")
+                    yield json.dumps({
+                        'type': 'error',
+                        'success': False,
+                        'error': 'Sorry, I encountered an error processing your images.'
+                    }) + '\n'
+                finally:
+                    if not recorded:
+                        # Client disconnected mid-stream; still record what was analyzed
+                        try:
+                            bot.summarize_image_results(user_id, results)
+                        except Exception as e:
+                            logging.error(f"Multi-image session recording error: {e}")
+            
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        result = bot.process_images(user_id, uploads)
+        
+        return jsonify({
+            'success': True,
+            'user_id': user_id,
+            **result
+        })
+        
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        logging.error(f"Multi-image processing error: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Sorry, I encountered an error processing your images.'
+        }), 500
+
 @app.route('/api/voice', methods=['POST'])
 def voice():
     """Handle voice input"""
@@ -134,6 +231,49 @@ def voice():
             'error': 'Sorry, I encountered an error processing your voice input.'
         }), 500
 
+@app.route('/api/admin/profile', methods=['POST'])
+def admin_profile():
+    """Run the sampling profiler inside this worker for a number of seconds
+    
+    Requires the X-Admin-Token header to match ADMIN_TOKEN. Samples come from
+    other request threads in the same worker, which is why the App Service
+    startup command runs gunicorn with gthread workers.
+    Pass ``format=collapsed`` to get plain flame-graph input instead of JSON.
+    """
+    if not config or not config.ADMIN_TOKEN:
+        return jsonify({'error': 'Not found'}), 404
+    
+    # Compare bytes: compare_digest rejects non-ASCII str input with a TypeError
+    supplied_token = request.headers.get('X-Admin-Token', '').encode('utf-8')
+    if not hmac.compare_digest(supplied_token, config.ADMIN_TOKEN.encode('utf-8')):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    max_seconds = config.PROFILER_MAX_SECONDS
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval_ms = float(request.args.get('interval_ms', 10))
+    except ValueError:
+        return jsonify({'error': 'seconds and interval_ms must be numbers'}), 400
+    
+    if not 0 < seconds <= max_seconds or not 1 <= interval_ms <= 1000:
+        return jsonify({
+            'error': f'seconds must be in (0, {max_seconds:g}] and interval_ms in [1, 1000]'
+        }), 400
+    
+    try:
+        report = profiler.profile(seconds, interval_ms / 1000)
+    except ProfilerBusyError as e:
+        return jsonify({'error': str(e)}), 409
+    
+    if request.args.get('format') == 'collapsed':
+        return Response(report['collapsed'] + '\n', mimetype='text/plain')
+    
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        **report
+    })
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8000))
     debug = os.environ.get('DEBUG', 'False').lower() == 'true'
@@ -1,8 +1,16 @@
+import io
 import logging
 import json
+import re
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+from comparison import ComparisonEngine
+from profiler import profiler
+from ranking import CatalogRanker, new_preferences, update_preferences
+
 # Import Azure SDKs (will use Terraform-injected config)
 try:
     import openai
@@ -14,14 +22,23 @@ except ImportError:
     logging.warning("⚠️ Azure SDKs not installed. Running in mock mode.")
     AZURE_SERVICES_AVAILABLE = False
 
+GREETING_WORDS = {'hello', 'hi', 'hey'}
+COMPARISON_WORDS = {'compare', 'comparison', 'difference', 'differences', 'versus', 'vs'}
+
+TECH_TAGS = ['laptop', 'computer', 'phone', 'smartphone', 'tablet', 'monitor', 'keyboard']
+
 class TechMartBot:
     """TechMart AI Bot with Terraform-injected Azure configuration"""
     
     def __init__(self, config):
         self.config = config
         self.user_sessions = {}
+        # gunicorn runs gthread workers, so concurrent requests share these sessions
+        self.sessions_lock = threading.RLock()
         self.setup_azure_services()
         self.products = self.load_sample_products()
+        self.ranker = CatalogRanker(self.products)
+        self.comparison = ComparisonEngine(self.products)
         logging.info("🤖 TechMart Bot initialized with Terraform configuration")
     
     def setup_azure_services(self):
@@ -121,31 +138,51 @@ class TechMartBot:
             }
         ]
     
-    def process_message(self, user_id, message):
-        """Process text message using Terraform-configured Azure services"""
-        try:
-            # Initialize user session
+    def get_session(self, user_id):
+        """Return the user's session, creating it on first contact"""
+        with self.sessions_lock:
             if user_id not in self.user_sessions:
                 self.user_sessions[user_id] = {
                     'conversation_history': [],
-                    'preferences': {}
+                    'preferences': new_preferences()
                 }
+            return self.user_sessions[user_id]
+    
+    def get_preferences(self, user_id):
+        """Snapshot of the user's preference profile, safe to read while other requests update it"""
+        with self.sessions_lock:
+            preferences = self.user_sessions.get(user_id, {}).get('preferences')
+            if preferences is None:
+                return None
+            return {key: dict(value) if isinstance(value, dict) else value for key, value in preferences.items()}
+    
+    def process_message(self, user_id, message):
+        """Process text message using Terraform-configured Azure services"""
+        try:
+            signals = self.ranker.extract_signals(message)
             
-            # Add to conversation history
-            self.user_sessions[user_id]['conversation_history'].append({
-                'user': message,
-                'timestamp': datetime.now().isoformat()
-            })
+            with self.sessions_lock:
+                session = self.get_session(user_id)
+                
+                # Add to conversation history
+                session['conversation_history'].append({
+                    'user': message,
+                    'timestamp': datetime.now().isoformat()
+                })
+                
+                # Learn from what the user is asking about
+                update_preferences(session['preferences'], signals)
             
             # Analyze intent and generate response
             intent = self.analyze_intent(message)
             response = self.generate_response(user_id, message, intent)
             
             # Add response to history
-            self.user_sessions[user_id]['conversation_history'].append({
-                'bot': response,
-                'timestamp': datetime.now().isoformat()
-            })
+            with self.sessions_lock:
+                session['conversation_history'].append({
+                    'bot': response,
+                    'timestamp': datetime.now().isoformat()
+                })
             
             return response
             
@@ -157,8 +194,14 @@ class TechMartBot:
         """Analyze user intent"""
         message_lower = message.lower()
         
-        # Enhanced intent recognition
-        if any(word in message_lower for word in ['hello', 'hi', 'hey', 'good morning', 'good afternoon']):
+        words = set(re.findall(r'[a-z]+', message_lower))
+        
+        # Comparisons naming products win over greetings and category keywords ("iPhone vs Galaxy")
+        if self.is_product_comparison(message):
+            return {'intent': 'product_compare'}
+        
+        # Enhanced intent recognition (whole words, so "which" or "this" isn't a greeting)
+        elif words & GREETING_WORDS or any(phrase in message_lower for phrase in ['good morning', 'good afternoon']):
             return {'intent': 'greeting'}
         
         elif any(word in message_lower for word in ['laptop', 'computer', 'notebook']):
@@ -188,6 +231,21 @@ class TechMartBot:
         else:
             return {'intent': 'general_query', 'message': message}
     
+    def is_product_comparison(self, message):
+        """True when a message explicitly compares named products
+        
+        An explicit comparison word plus one named product is enough ("compare the
+        XPS"); a softer word like "better" needs at least two named products.
+        Models we don't stock ("iPhone 14") count, so the reply can say so.
+        """
+        words = set(re.findall(r'[a-z]+', message.lower()))
+        if not words & COMPARISON_WORDS and 'better' not in words:
+            return False
+        
+        product_ids, unknown = self.comparison.resolve_mentions(message)
+        named = len(product_ids) + len(unknown)
+        return named >= 1 if words & COMPARISON_WORDS else named >= 2
+    
     def generate_response(self, user_id, message, intent):
         """Generate response based on intent"""
         try:
@@ -206,10 +264,10 @@ What are you looking for today?"""
                 return self.handle_product_search(intent)
             
             elif intent['intent'] == 'product_compare':
-                return self.handle_comparison_request()
+                return self.handle_comparison_request(message)
             
             elif intent['intent'] == 'recommendation':
-                return self.handle_recommendation_request()
+                return self.handle_recommendation_request(user_id)
             
             elif intent['intent'] == 'price_inquiry':
                 return self.handle_price_inquiry()
@@ -275,8 +333,12 @@ Tell me your specific needs and budget!"""
         response += "\n💡 **Need help deciding?** Tell me your budget and how you'll use it!"
         return response
     
-    def handle_comparison_request(self):
-        """Handle product comparison requests"""
+    def handle_comparison_request(self, message=''):
+        """Handle product comparison requests using the catalog comparison engine"""
+        comparison = self.comparison.compare_message(message)
+        if comparison:
+            return comparison
+        
         return """🆚 **Product Comparisons:**
 
 **Popular Laptop Comparisons:**
@@ -295,19 +357,31 @@ Tell me your specific needs and budget!"""
 
 **Tell me specific products you want compared!**"""
     
-    def handle_recommendation_request(self):
-        """Handle recommendation requests"""
-        # Get top-rated products across categories
-        top_products = sorted(self.products, key=lambda x: x['rating'], reverse=True)[:4]
+    def handle_recommendation_request(self, user_id=None):
+        """Handle recommendation requests, personalized by the session's preference profile"""
+        preferences = self.get_preferences(user_id)
+        personalized = bool(preferences and preferences.get('updates'))
+        top_products = self.ranker.top_k(preferences if personalized else None, k=4)
         
-        response = "🌟 **My Top Recommendations:**\n\n"
+        if personalized:
+            interests = sorted(
+                {**preferences['categories'], **preferences['brands'], **preferences['use_cases']}.items(),
+                key=lambda item: item[1], reverse=True
+            )[:3]
+            based_on = f" (based on: {', '.join(name for name, _ in interests)})" if interests else ""
+            response = f"🌟 **Recommended For You**{based_on}:\n\n"
+        else:
+            response = "🌟 **My Top Recommendations:**\n\n"
         
         for i, product in enumerate(top_products, 1):
             response += f"**{i}. {product['name']}** - ${product['price']:,.2f}\n"
             response += f"   📱 {product['category'].title()} | ⭐ {product['rating']}/5\n"
             response += f"   ✨ {product['features'][:60]}...\n\n"
         
-        response += """💡 **For personalized recommendations, tell me:**
+        if personalized:
+            response += "💡 **Want to narrow it down? Tell me more about your budget or how you'll use it!**"
+        else:
+            response += """💡 **For personalized recommendations, tell me:**
 - Your budget range
 - Primary use (work, gaming, photography, etc.)
 - Preferred brand or features
@@ -397,6 +471,34 @@ What specific technology product or question can I help you with today?"""
             logging.error(f"AI query error: {e}")
             return "I'm here to help you find great technology products! What are you looking for - laptops, smartphones, or something else?"
     
+    def analyze_image(self, image_data):
+        """Run Computer Vision on one image and return its caption and detected tech tags"""
+        image_stream = io.BytesIO(image_data)
+        
+        # Analyze image
+        analysis = self.cv_client.analyze_image_in_stream(
+            image_stream,
+            visual_features=['Description', 'Tags', 'Objects']
+        )
+        
+        # Process results
+        description = ""
+        if analysis.description and analysis.description.captions:
+            description = analysis.description.captions[0].text
+        
+        # Detect tech products
+        detected_tech = [tag.name for tag in analysis.tags if tag.name.lower() in TECH_TAGS and tag.confidence > 0.5]
+        
+        return {'description': description, 'detected_tech': detected_tech}
+    
+    def get_similar_products(self, tech_type, limit=2):
+        """Map a detected tech tag to matching catalog products"""
+        if 'laptop' in tech_type or 'computer' in tech_type:
+            return [p for p in self.products if p['category'] == 'laptop'][:limit]
+        elif 'phone' in tech_type:
+            return [p for p in self.products if p['category'] == 'smartphone'][:limit]
+        return []
+    
     def process_image(self, user_id, image_data):
         """Process uploaded image using Terraform-configured Computer Vision"""
         try:
@@ -404,35 +506,16 @@ What specific technology product or question can I help you with today?"""
                 return self.mock_image_processing()
             
             # Use Azure Computer Vision with Terraform-injected config
-            import io
-            image_stream = io.BytesIO(image_data)
-            
-            # Analyze image
-            analysis = self.cv_client.analyze_image_in_stream(
-                image_stream,
-                visual_features=['Description', 'Tags', 'Objects']
-            )
-            
-            # Process results
-            description = ""
-            if analysis.description and analysis.description.captions:
-                description = analysis.description.captions[0].text
-            
-            # Detect tech products
-            tech_tags = ['laptop', 'computer', 'phone', 'smartphone', 'tablet', 'monitor', 'keyboard']
-            detected_tech = [tag.name for tag in analysis.tags if tag.name.lower() in tech_tags and tag.confidence > 0.5]
+            analysis = self.analyze_image(image_data)
+            description = analysis['description']
+            detected_tech = analysis['detected_tech']
             
             if detected_tech:
                 tech_type = detected_tech[0].lower()
                 response = f"📷 **Image Analysis Complete!**\n\nI can see this appears to be a **{tech_type}**!\n\n"
                 
                 # Get similar products
-                if 'laptop' in tech_type or 'computer' in tech_type:
-                    similar_products = [p for p in self.products if p['category'] == 'laptop'][:2]
-                elif 'phone' in tech_type:
-                    similar_products = [p for p in self.products if p['category'] == 'smartphone'][:2]
-                else:
-                    similar_products = []
+                similar_products = self.get_similar_products(tech_type)
                 
                 if similar_products:
                     response += "**Here are some similar products I'd recommend:**\n\n"
@@ -451,6 +534,103 @@ What specific technology product or question can I help you with today?"""
             logging.error(f"Image processing error: {e}")
             return self.mock_image_processing()
     
+    def iter_image_results(self, images):
+        """Analyze several images concurrently, yielding each result as it finishes
+        
+        ``images`` is a list of ``(filename, image_data)`` tuples. Parallelism is
+        bounded by ``MAX_IMAGE_WORKERS`` so a large upload can't flood Computer Vision.
+        """
+        if not AZURE_SERVICES_AVAILABLE or not getattr(self, 'cv_client', None):
+            for index, (filename, _) in enumerate(images):
+                yield {'index': index, 'filename': filename, 'success': True,
+                       'description': '', 'detected_tech': [], 'mock': True}
+            return
+        
+        max_workers = max(1, min(self.config.MAX_IMAGE_WORKERS, len(images)))
+        # Keep profiler attribution for the vision calls made on pool threads
+        analyze = profiler.propagate(self.analyze_image)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(analyze, image_data): (index, filename)
+                for index, (filename, image_data) in enumerate(images)
+            }
+            for future in as_completed(futures):
+                index, filename = futures[future]
+                try:
+                    analysis = future.result()
+                    yield {'index': index, 'filename': filename, 'success': True, **analysis}
+                except Exception as e:
+                    logging.error(f"Image processing error ({filename}): {e}")
+                    yield {'index': index, 'filename': filename, 'success': False,
+                           'description': '', 'detected_tech': [],
+                           'error': 'Could not analyze this image.'}
+    
+    def summarize_image_results(self, user_id, results):
+        """Merge detected tech tags across images into one set of catalog suggestions
+        
+        The upload and the reply are recorded in the user's conversation history,
+        and detected tags feed their preference profile like a typed message would.
+        """
+        detected_tech = sorted({tag.lower() for r in results for tag in r['detected_tech']})
+        
+        suggestions = []
+        seen_ids = set()
+        for tech_type in detected_tech:
+            for product in self.get_similar_products(tech_type):
+                if product['id'] not in seen_ids:
+                    seen_ids.add(product['id'])
+                    suggestions.append(product)
+        
+        analyzed = [r for r in results if r['success']]
+        failed = len(results) - len(analyzed)
+        analyzed_label = f"{len(analyzed)} Image{'' if len(analyzed) == 1 else 's'}"
+        
+        if not results or all(r.get('mock') for r in results):
+            response = self.mock_image_processing()
+        elif not analyzed:
+            response = "📷 **Image Analysis Failed**\n\nSorry, I couldn't analyze any of these images. Please try uploading them again."
+        elif suggestions:
+            response = f"📷 **Analyzed {analyzed_label}!**\n\nI spotted: **{', '.join(detected_tech)}**\n\n"
+            response += "**Here are some similar products I'd recommend:**\n\n"
+            for product in suggestions:
+                response += f"• **{product['name']}** - ${product['price']:,.2f}\n"
+                response += f"  ⭐ {product['rating']}/5 | {product['features'][:50]}...\n\n"
+            response += "💡 **Want me to compare any of these products?**"
+        else:
+            response = f"📷 **Analyzed {analyzed_label}!**\n\nI couldn't identify a specific tech product in these photos.\n\n**What type of technology are you looking for?**"
+        
+        if analyzed and failed:
+            response += f"\n\n⚠️ {failed} image{' was' if failed == 1 else 's were'} not analyzed. Please try uploading {'it' if failed == 1 else 'them'} again."
+        
+        signals = self.ranker.extract_signals(' '.join(detected_tech))
+        with self.sessions_lock:
+            session = self.get_session(user_id)
+            session['conversation_history'].append({
+                'user': f"[Uploaded {len(results)} image{'' if len(results) == 1 else 's'}]",
+                'detected_tech': detected_tech,
+                'timestamp': datetime.now().isoformat()
+            })
+            update_preferences(session['preferences'], signals)
+            session['conversation_history'].append({
+                'bot': response,
+                'timestamp': datetime.now().isoformat()
+            })
+        
+        return {
+            'analyzed': len(analyzed),
+            'failed': failed,
+            'detected_tech': detected_tech,
+            'suggestions': [p['id'] for p in suggestions],
+            'response': response
+        }
+    
+    def process_images(self, user_id, images):
+        """Process several uploaded images in one request"""
+        results = sorted(self.iter_image_results(images), key=lambda r: r['index'])
+        summary = self.summarize_image_results(user_id, results)
+        summary['results'] = results
+        return summary
+    
     def mock_image_processing(self):
         """Mock image processing when Azure services not available"""
         return """📷 **Image Analysis (Demo Mode):**
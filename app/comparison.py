@@ -0,0 +1,286 @@
+import re
+from functools import lru_cache
+
+# Typed spec columns parsed from each product's features string:
+# (key, label, unit, higher_is_better)
+SPEC_COLUMNS = [
+    ('cpu', '🧠 Processor', None, None),
+    ('gpu', '🎮 Graphics', None, None),
+    ('ram_gb', '💾 RAM', 'GB', True),
+    ('storage_gb', '📦 Storage', 'GB', True),
+    ('display_in', '🖥️ Display', '"', None),
+    ('camera_mp', '📷 Camera', 'MP', True)
+]
+
+CPU_PATTERN = re.compile(r'\b(intel|amd|ryzen|core|apple m\d|a\d+ (?:pro|bionic)|snapdragon|tensor|chip)\b', re.IGNORECASE)
+GPU_PATTERN = re.compile(r'\b(rtx|gtx|radeon|arc)\b', re.IGNORECASE)
+RAM_PATTERN = re.compile(r'(\d+)\s*GB\s+(?:LPDDR\d\w*|DDR\d\w*|unified memory|RAM|memory)', re.IGNORECASE)
+STORAGE_PATTERN = re.compile(r'(\d+)\s*(GB|TB)\s+(?:SSD|HDD|storage)', re.IGNORECASE)
+DISPLAY_PATTERN = re.compile(r'(\d+(?:\.\d+)?)"\s*(.*)')
+CAMERA_PATTERN = re.compile(r'(\d+)\s*MP\b', re.IGNORECASE)
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Longest name fragment (in tokens, before the brand prefix) indexed as an alias
+MAX_ALIAS_TOKENS = 4
+# Name words that also appear in everyday phrases ("air travel", "pro tips"); an
+# alias must contain at least one token that is neither one of these nor a brand
+GENERIC_NAME_TOKENS = {'air', 'pro', 'ultra', 'plus', 'max', 'mini', 'lite', 'edge', 'note', 'go', 'neo'}
+COMPARISON_CACHE_SIZE = 256
+# A token right after a matched name that makes it a different model ("iphone 14",
+# "galaxy s23", "macbook pro"); storage sizes and years don't count
+VARIANT_TOKEN_PATTERN = re.compile(r'^(?:\d{1,3}|[a-z]+\d+[a-z]*)$')
+
+
+def parse_features(features):
+    """Parse a free-text features string into typed spec attributes"""
+    specs = {'extras': []}
+
+    for part in (p.strip() for p in features.split(',')):
+        if not part:
+            continue
+
+        ram = RAM_PATTERN.search(part)
+        storage = STORAGE_PATTERN.search(part)
+        display = DISPLAY_PATTERN.search(part)
+        camera = CAMERA_PATTERN.search(part)
+
+        if ram and 'ram_gb' not in specs:
+            specs['ram_gb'] = int(ram.group(1))
+        elif storage and 'storage_gb' not in specs:
+            size = int(storage.group(1))
+            specs['storage_gb'] = size * 1024 if storage.group(2).upper() == 'TB' else size
+        elif display and 'display_in' not in specs:
+            specs['display_in'] = float(display.group(1))
+            if display.group(2):
+                specs['display_detail'] = display.group(2).strip()
+        elif camera and 'camera_mp' not in specs:
+            specs['camera_mp'] = int(camera.group(1))
+        elif GPU_PATTERN.search(part) and 'gpu' not in specs:
+            specs['gpu'] = part
+        elif CPU_PATTERN.search(part) and 'cpu' not in specs:
+            specs['cpu'] = re.sub(r'\s+chip$', '', part, flags=re.IGNORECASE)
+        else:
+            specs['extras'].append(part)
+
+    return specs
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class ComparisonEngine:
+    """Catalog-backed product comparisons
+
+    Features strings are parsed into typed columns once at load time, product
+    names are resolved through a prebuilt alias index, and rendered comparisons
+    are memoized so repeat matchups skip the formatting work entirely.
+    """
+
+    def __init__(self, products):
+        self.products = {p['id']: p for p in products}
+        self.specs = {p['id']: parse_features(p['features']) for p in products}
+        self.aliases = self.build_alias_index(products)
+        self.max_alias_tokens = max((len(alias) for alias in self.aliases), default=0)
+        self.render_comparison = lru_cache(maxsize=COMPARISON_CACHE_SIZE)(self._render_comparison)
+
+    def build_alias_index(self, products):
+        """Map every unambiguous name fragment (e.g. 'xps', 'galaxy s24', 'iphone 15 pro') to one product id"""
+        candidates = {}
+
+        for product in products:
+            # Drop parentheticals like "(2024)" from the searchable name
+            name_tokens = tokenize(re.sub(r'\(.*?\)', '', product['name']))
+            brand_tokens = tokenize(product['brand'])
+
+            fragments = set()
+            for start in range(len(name_tokens)):
+                for end in range(start + 1, min(start + MAX_ALIAS_TOKENS, len(name_tokens)) + 1):
+                    fragment = tuple(name_tokens[start:end])
+                    # Lone brands, numbers and generic words ("dell", "13", "air") aren't product references
+                    if not any(self._is_model_token(token, brand_tokens) for token in fragment):
+                        continue
+                    fragments.add(fragment)
+                    if fragment[:len(brand_tokens)] != tuple(brand_tokens):
+                        fragments.add(tuple(brand_tokens) + fragment)
+
+            for fragment in fragments:
+                candidates.setdefault(fragment, set()).add(product['id'])
+
+        return {alias: next(iter(ids)) for alias, ids in candidates.items() if len(ids) == 1}
+
+    def _is_model_token(self, token, brand_tokens):
+        return not token.isdigit() and token not in brand_tokens and token not in GENERIC_NAME_TOKENS
+
+    def resolve(self, message):
+        """Return catalog product ids named in the message, in order of mention"""
+        return self.resolve_mentions(message)[0]
+
+    def resolve_mentions(self, message):
+        """Resolve product names in a message
+
+        Returns ``(product_ids, unknown)``: catalog ids in order of mention, and
+        ``(name, category)`` pairs for models that extend a catalog name but
+        aren't stocked ("iPhone 14" next to our iPhone 15 Pro).
+        """
+        tokens = tokenize(message)
+        found = []
+        unknown = []
+        position = 0
+
+        while position < len(tokens):
+            for length in range(min(self.max_alias_tokens, len(tokens) - position), 0, -1):
+                product_id = self.aliases.get(tuple(tokens[position:position + length]))
+                if product_id:
+                    end = position + length
+                    if end < len(tokens) and self._is_variant_token(tokens[end]):
+                        # Longest match stopped short of the next model token: a different model
+                        name = self._original_text(message, tokens[position:end + 1])
+                        unknown.append((name, self.products[product_id]['category']))
+                        end += 1
+                    elif product_id not in found:
+                        found.append(product_id)
+                    position = end
+                    break
+            else:
+                position += 1
+
+        return found, unknown
+
+    def _is_variant_token(self, token):
+        return token in GENERIC_NAME_TOKENS or bool(VARIANT_TOKEN_PATTERN.match(token))
+
+    def _original_text(self, message, tokens):
+        match = re.search(r'\b' + r'\W+'.join(re.escape(t) for t in tokens) + r'\b', message, re.IGNORECASE)
+        return match.group(0) if match else ' '.join(tokens)
+
+    def best_alternative(self, product_id):
+        """Highest-rated other product in the same category, used when only one product is named"""
+        category = self.products[product_id]['category']
+        alternatives = [
+            p for p in self.products.values()
+            if p['category'] == category and p['id'] != product_id
+        ]
+        if not alternatives:
+            return None
+        return max(alternatives, key=lambda p: p['rating'])['id']
+
+    def compare_message(self, message, max_products=3):
+        """Resolve products in a message and render their comparison, or None if nothing matched"""
+        product_ids, unknown = self.resolve_mentions(message)
+        if unknown:
+            return self.render_not_in_catalog(unknown, product_ids)
+
+        product_ids = product_ids[:max_products]
+        if len(product_ids) == 1:
+            alternative = self.best_alternative(product_ids[0])
+            if alternative:
+                product_ids.append(alternative)
+
+        if len(product_ids) < 2:
+            return None
+
+        return self.render_comparison(tuple(product_ids))
+
+    def render_not_in_catalog(self, unknown, product_ids):
+        """Explain that a named model isn't stocked instead of comparing something else"""
+        names = ', '.join(f"**{name}**" for name, _ in unknown)
+        response = f"🔍 **Not in our catalog:** {names}\n\n"
+        response += "I can only compare products TechMart carries, so I won't guess at a substitute.\n\n"
+
+        if product_ids:
+            stocked = ', '.join(f"**{self.products[pid]['name']}**" for pid in product_ids)
+            response += f"We do carry {stocked}.\n\n"
+
+        for category in dict.fromkeys(category for _, category in unknown):
+            available = [p['name'] for p in self.products.values() if p['category'] == category]
+            response += f"**Available {category}s:** {', '.join(available)}\n"
+
+        response += "\n💡 **Pick any two of these and I'll compare them side by side!**"
+        return response
+
+    def _format_value(self, key, value, unit):
+        if value is None:
+            return '—'
+        if key == 'storage_gb' and value >= 1024 and value % 1024 == 0:
+            return f"{value // 1024}TB"
+        if key == 'display_in':
+            return f"{value:g}{unit}"
+        return f"{value}{unit}" if unit else str(value)
+
+    def _row(self, label, values, best=None):
+        cells = [f"{value} ✅" if best is not None and i in best else value for i, value in enumerate(values)]
+        return f"**{label}:** {' | '.join(cells)}\n"
+
+    def _render_comparison(self, product_ids):
+        products = [self.products[pid] for pid in product_ids]
+        specs = [self.specs[pid] for pid in product_ids]
+
+        response = f"🆚 **{' vs '.join(p['name'] for p in products)}**\n\n"
+
+        prices = [p['price'] for p in products]
+        ratings = [p['rating'] for p in products]
+        response += self._row('💰 Price', [f"${price:,.2f}" for price in prices],
+                              {i for i, price in enumerate(prices) if price == min(prices)})
+        response += self._row('⭐ Rating', [f"{rating}/5" for rating in ratings],
+                              {i for i, rating in enumerate(ratings) if rating == max(ratings)})
+
+        for key, label, unit, higher_is_better in SPEC_COLUMNS:
+            column = [s.get(key) for s in specs]
+            if all(value is None for value in column):
+                continue
+
+            best = None
+            known = [value for value in column if value is not None]
+            if higher_is_better and len(known) > 1 and len(set(known)) > 1:
+                best = {i for i, value in enumerate(column) if value == max(known)}
+
+            values = [self._format_value(key, value, unit) for value in column]
+            if key == 'display_in':
+                values = [
+                    f"{value} {s['display_detail']}" if s.get('display_detail') else value
+                    for value, s in zip(values, specs)
+                ]
+            response += self._row(label, values, best)
+
+        if any(spec['extras'] for spec in specs):
+            response += self._row('✨ Also', [', '.join(spec['extras']) or '—' for spec in specs])
+
+        response += self._row('🎯 Best for', [', '.join(p['use_cases']) for p in products])
+
+        differences = self._key_differences(products, specs)
+        if differences:
+            response += "\n**Key Differences:**\n"
+            response += ''.join(f"- {line}\n" for line in differences)
+
+        response += "\n💡 **Want more details on any of these, or a different matchup?**"
+        return response
+
+    def _key_differences(self, products, specs):
+        """Plain-language diffs between the first two products"""
+        (a, b), (spec_a, spec_b) = products[:2], specs[:2]
+        lines = []
+
+        if a['price'] != b['price']:
+            cheaper, pricier = (a, b) if a['price'] < b['price'] else (b, a)
+            lines.append(f"**{cheaper['name']}** is ${pricier['price'] - cheaper['price']:,.2f} cheaper")
+
+        for key, label, unit, higher_is_better in SPEC_COLUMNS:
+            value_a, value_b = spec_a.get(key), spec_b.get(key)
+            if not higher_is_better or value_a is None or value_b is None or value_a == value_b:
+                continue
+            winner, high, low = (a, value_a, value_b) if value_a > value_b else (b, value_b, value_a)
+            name = label.split(' ', 1)[1]
+            name = name if name.isupper() else name.lower()
+            lines.append(
+                f"**{winner['name']}** has {round(high / low, 1):g}x the {name} "
+                f"({self._format_value(key, high, unit)} vs {self._format_value(key, low, unit)})"
+            )
+
+        if spec_a.get('gpu') and not spec_b.get('gpu'):
+            lines.append(f"**{a['name']}** adds dedicated graphics ({spec_a['gpu']})")
+        elif spec_b.get('gpu') and not spec_a.get('gpu'):
+            lines.append(f"**{b['name']}** adds dedicated graphics ({spec_b['gpu']})")
+
+        return lines
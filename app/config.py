@@ -43,6 +43,15 @@ class Config:
         self.DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
         self.PORT = int(os.getenv('PORT', 8000))
         
+        # 📷 Multi-image uploads
+        self.MAX_IMAGE_WORKERS = int(os.getenv('MAX_IMAGE_WORKERS', 4))
+        self.MAX_IMAGES_PER_REQUEST = int(os.getenv('MAX_IMAGES_PER_REQUEST', 10))
+        self.MAX_UPLOAD_MB = int(os.getenv('MAX_UPLOAD_MB', 25))
+        
+        # 🔬 Admin profiling (the endpoint is disabled unless ADMIN_TOKEN is set)
+        self.ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+        self.PROFILER_MAX_SECONDS = float(os.getenv('PROFILER_MAX_SECONDS', 60))
+        
         logging.info(f"🌐 Environment: {self.ENVIRONMENT}")
         logging.info(f"🔧 Debug mode: {self.DEBUG}")
     
@@ -0,0 +1,241 @@
+import os
+import sys
+import threading
+import time
+import logging
+from collections import Counter, defaultdict
+from functools import wraps
+
+
+# Root label for busy threads that carry no route tag, e.g. requests already in
+# flight when the profile started; those are often the stuck ones
+UNTAGGED_ROUTE = '(untagged)'
+
+# Untagged threads are only sampled while running this app's code; idle server
+# and pool threads never have a frame from here on their stack
+APP_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is running in this worker"""
+
+
+class ProfileRun:
+    """Samples and per-route timings collected by one profile
+
+    Request threads and the sampler write into the run under ``lock``; once
+    ``closed`` is set no further writes are accepted, so the report can be built
+    from a stable snapshot.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.closed = False
+        self.route_stats = defaultdict(lambda: {'requests': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0, 'samples': 0})
+        self.stacks = Counter()
+        self.ticks = 0
+
+    def add_request(self, route, wall_ms, cpu_ms):
+        with self.lock:
+            if self.closed:
+                return
+            stats = self.route_stats[route]
+            stats['requests'] += 1
+            stats['wall_ms'] += wall_ms
+            stats['cpu_ms'] += cpu_ms
+
+    def add_cpu(self, route, cpu_ms):
+        with self.lock:
+            if not self.closed:
+                self.route_stats[route]['cpu_ms'] += cpu_ms
+
+    def add_samples(self, samples):
+        with self.lock:
+            if self.closed:
+                return
+            for route, stack in samples:
+                self.stacks[stack] += 1
+                self.route_stats[route]['samples'] += 1
+            self.ticks += 1
+
+    def close(self):
+        """Stop accepting writes and return a snapshot of the collected data"""
+        with self.lock:
+            self.closed = True
+            route_stats = {route: dict(stats) for route, stats in self.route_stats.items()}
+            return route_stats, Counter(self.stacks), self.ticks
+
+
+class SamplingProfiler:
+    """On-demand sampling profiler for a live worker
+
+    While a profile is running, a background thread snapshots every other
+    thread's stack with ``sys._current_frames()`` at a fixed interval. Stacks
+    are rooted at the Flask route the thread is serving (or ``(untagged)`` for
+    busy threads that started before the profile) so the collapsed output can
+    be fed straight into flamegraph.pl or speedscope.
+
+    When no profile is running the request hooks only check ``self.active``,
+    so there is no sampling cost on the hot path.
+    """
+
+    MAX_STACK_DEPTH = 64
+
+    def __init__(self):
+        self.active = False
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._run = None
+        self._excluded_threads = set()
+        self._app_files = {}
+
+    def request_started(self, route):
+        """Tag the current thread with the route it is serving (called from before_request)"""
+        run = self._run
+        if not self.active or run is None:
+            return None
+        self._routes[threading.get_ident()] = route
+        return (run, route, time.perf_counter(), time.thread_time())
+
+    def request_finished(self, token):
+        """Record wall/CPU time for a request tagged by request_started"""
+        if token is None:
+            return
+        run, route, wall_start, cpu_start = token
+        self._routes.pop(threading.get_ident(), None)
+        run.add_request(route, (time.perf_counter() - wall_start) * 1000, (time.thread_time() - cpu_start) * 1000)
+
+    def propagate(self, fn):
+        """Carry the calling thread's route tag into work handed to another thread
+
+        Wrap callables submitted to a thread pool so their samples and CPU time
+        are attributed to the route that spawned them. Returns ``fn`` unchanged
+        when no profile is running.
+        """
+        run = self._run
+        route = self._routes.get(threading.get_ident()) if self.active else None
+        if route is None or run is None:
+            return fn
+
+        @wraps(fn)
+        def tagged(*args, **kwargs):
+            ident = threading.get_ident()
+            self._routes[ident] = route
+            cpu_start = time.thread_time()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._routes.pop(ident, None)
+                run.add_cpu(route, (time.thread_time() - cpu_start) * 1000)
+
+        return tagged
+
+    def profile(self, seconds, interval=0.01):
+        """Sample all other threads for ``seconds`` and return the aggregated profile
+
+        Raises ProfilerBusyError if another profile is already running in this worker.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running in this worker")
+
+        try:
+            run = ProfileRun()
+            self._routes.clear()
+            self._run = run
+            self._excluded_threads = {threading.get_ident()}
+            sampler = threading.Thread(target=self._sample_loop, args=(run, seconds, interval), daemon=True)
+
+            started = time.perf_counter()
+            self.active = True
+            sampler.start()
+            sampler.join()
+            elapsed = time.perf_counter() - started
+
+            self.active = False
+            route_stats, stacks, ticks = run.close()
+
+            logging.info(f"🔬 Profile captured: {sum(stacks.values())} samples over {elapsed:.1f}s")
+            return self._build_report(route_stats, stacks, ticks, elapsed, interval)
+
+        finally:
+            self.active = False
+            self._run = None
+            self._routes.clear()
+            self._lock.release()
+
+    def _sample_loop(self, run, seconds, interval):
+        sampler_ident = threading.get_ident()
+        deadline = time.perf_counter() + seconds
+
+        while time.perf_counter() < deadline:
+            samples = []
+            for ident, frame in sys._current_frames().items():
+                if ident == sampler_ident or ident in self._excluded_threads:
+                    continue
+
+                route = self._routes.get(ident)
+                if route is None:
+                    if not self._in_app_code(frame):
+                        continue
+                    route = UNTAGGED_ROUTE
+
+                samples.append((route, self._collapse(route, frame)))
+
+            run.add_samples(samples)
+            time.sleep(interval)
+
+    def _is_app_file(self, filename):
+        # co_filename can be relative or contain '..', so normalize once per file
+        is_app = self._app_files.get(filename)
+        if is_app is None:
+            is_app = self._app_files[filename] = os.path.abspath(filename).startswith(APP_DIR)
+        return is_app
+
+    def _in_app_code(self, frame):
+        depth = 0
+        while frame is not None and depth < self.MAX_STACK_DEPTH:
+            if self._is_app_file(frame.f_code.co_filename):
+                return True
+            frame = frame.f_back
+            depth += 1
+        return False
+
+    def _collapse(self, route, frame):
+        frames = []
+        while frame is not None and len(frames) < self.MAX_STACK_DEPTH:
+            code = frame.f_code
+            filename = code.co_filename.rsplit('/', 1)[-1]
+            frames.append(f"{filename}:{code.co_name}")
+            frame = frame.f_back
+        frames.append(route)
+        return ';'.join(reversed(frames))
+
+    def _build_report(self, route_stats, stacks, ticks, elapsed, interval):
+        # Sampling overhead stretches the real tick period beyond the nominal interval
+        tick_ms = elapsed * 1000 / ticks if ticks else interval * 1000
+        collapsed = '\n'.join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+        routes = {}
+        for route, stats in route_stats.items():
+            routes[route] = {
+                'requests': stats['requests'],
+                'samples': stats['samples'],
+                'sampled_ms': round(stats['samples'] * tick_ms, 1),
+                'wall_ms': round(stats['wall_ms'], 1),
+                'cpu_ms': round(stats['cpu_ms'], 1),
+                'avg_wall_ms': round(stats['wall_ms'] / stats['requests'], 1) if stats['requests'] else None,
+                'avg_cpu_ms': round(stats['cpu_ms'] / stats['requests'], 1) if stats['requests'] else None
+            }
+
+        return {
+            'duration_seconds': round(elapsed, 3),
+            'interval_ms': interval * 1000,
+            'effective_interval_ms': round(tick_ms, 3),
+            'total_samples': sum(stacks.values()),
+            'routes': routes,
+            'collapsed': collapsed
+        }
+
+
+# Shared per-worker instance used by the Flask hooks and the bot's thread pools
+profiler = SamplingProfiler()
@@ -0,0 +1,170 @@
+import math
+import re
+
+import numpy as np
+
+# Words users say for each catalog category (mirrors TechMartBot.analyze_intent)
+CATEGORY_KEYWORDS = {
+    'laptop': ['laptop', 'computer', 'notebook'],
+    'smartphone': ['phone', 'smartphone', 'mobile', 'iphone', 'android']
+}
+
+PRICE_PATTERN = re.compile(
+    r'(?P<lead>\$|under|below|around|about|budget(?: of)?|less than|max(?:imum)?)\s*(?P<currency>\$)?\s*'
+    r'(?P<amount>\d[\d,]*(?:\.\d+)?)\s*(?P<suffix>k\b|dollars|usd|bucks)?',
+    re.IGNORECASE
+)
+# A number followed by one of these is a spec or a measurement ("128GB", "200 grams",
+# "10 hours"), not a price
+SPEC_UNIT_PATTERN = re.compile(
+    r'\s*(?:(?:gb|tb|mb|mp|hz|mah|nits|fps|ms|mm|cm|kg|g|grams?|lbs?|pounds?|oz|ounces?'
+    r'|h|hrs?|hours?|days?|weeks?|months?|yrs?|years?|w|watts?|cores?|inch(?:es)?|in)\b|%|")',
+    re.IGNORECASE
+)
+# Lead-ins that also precede specs ("around 128GB", "max 256") need an explicit currency
+GENERIC_PRICE_LEADS = {'around', 'about', 'max', 'maximum'}
+
+# Older signals fade so the profile follows what the user is asking about now
+PREFERENCE_DECAY = 0.8
+PRICE_SMOOTHING = 0.5
+
+# Score weights: rating keeps good products on top, affinity and price fit personalize
+RATING_WEIGHT = 1.0
+AFFINITY_WEIGHT = 1.5
+PRICE_WEIGHT = 1.0
+# Width of the price-fit bell curve in log-price space (~±35% of the target)
+PRICE_TOLERANCE = 0.35
+
+
+def new_preferences():
+    """Empty per-session preference profile (plain dicts so it stays JSON-serializable)"""
+    return {'categories': {}, 'brands': {}, 'use_cases': {}, 'price': None, 'updates': 0}
+
+
+def update_preferences(preferences, signals):
+    """Fold one message's signals into the profile, decaying older ones"""
+    if not any(signals.values()):
+        return preferences
+
+    for key in ('categories', 'brands', 'use_cases'):
+        weights = preferences.setdefault(key, {})
+        for name in weights:
+            weights[name] *= PREFERENCE_DECAY
+        for name in signals[key]:
+            weights[name] = weights.get(name, 0.0) + 1.0
+
+    if signals['price']:
+        previous = preferences.get('price')
+        price = signals['price']
+        preferences['price'] = price if previous is None else PRICE_SMOOTHING * price + (1 - PRICE_SMOOTHING) * previous
+
+    preferences['updates'] = preferences.get('updates', 0) + 1
+    return preferences
+
+
+class CatalogRanker:
+    """Vectorized catalog scoring against a session preference profile
+
+    Product attributes are encoded into NumPy arrays once, so each ranking is a
+    handful of array ops plus a partial top-k selection instead of a full sort.
+    """
+
+    def __init__(self, products):
+        self.products = products
+
+        self.categories = sorted({p['category'] for p in products})
+        self.brands = sorted({p['brand'].lower() for p in products})
+        self.use_cases = sorted({u.lower() for p in products for u in p['use_cases']})
+        self.category_index = {name: i for i, name in enumerate(self.categories)}
+        self.brand_index = {name: i for i, name in enumerate(self.brands)}
+        self.use_case_index = {name: i for i, name in enumerate(self.use_cases)}
+
+        self.category_ids = np.array([self.category_index[p['category']] for p in products], dtype=np.int32)
+        self.brand_ids = np.array([self.brand_index[p['brand'].lower()] for p in products], dtype=np.int32)
+        self.use_case_matrix = np.zeros((len(products), len(self.use_cases)), dtype=np.float32)
+        for row, product in enumerate(products):
+            for use_case in product['use_cases']:
+                self.use_case_matrix[row, self.use_case_index[use_case.lower()]] = 1.0
+        self.use_case_counts = np.maximum(self.use_case_matrix.sum(axis=1), 1.0)
+
+        self.rating_scores = np.array([p['rating'] for p in products], dtype=np.float32) / 5.0
+        self.log_prices = np.log(np.array([max(p['price'], 1.0) for p in products], dtype=np.float32))
+
+        self._brand_patterns = [(b, re.compile(rf'\b{re.escape(b)}\b')) for b in self.brands]
+        self._use_case_patterns = [(u, re.compile(rf'\b{re.escape(u)}\b')) for u in self.use_cases]
+
+    def extract_signals(self, message):
+        """Pull categories, brands, use cases and a price point out of a message"""
+        text = message.lower()
+
+        categories = [c for c, words in CATEGORY_KEYWORDS.items() if c in self.category_index and any(w in text for w in words)]
+        brands = [b for b, pattern in self._brand_patterns if pattern.search(text)]
+        use_cases = [u for u, pattern in self._use_case_patterns if pattern.search(text)]
+
+        return {
+            'categories': categories,
+            'brands': brands,
+            'use_cases': use_cases,
+            'price': self.extract_price(message)
+        }
+
+    def extract_price(self, message):
+        """Return the first price point mentioned in a message, ignoring spec numbers"""
+        for match in PRICE_PATTERN.finditer(message):
+            if SPEC_UNIT_PATTERN.match(message, match.end('amount')):
+                continue
+
+            lead = match.group('lead').lower()
+            explicit = lead == '$' or match.group('currency') or match.group('suffix')
+            if lead in GENERIC_PRICE_LEADS and not explicit:
+                continue
+
+            value = float(match.group('amount').replace(',', ''))
+            if (match.group('suffix') or '').lower() == 'k':
+                value *= 1000
+            if value >= 50:
+                return value
+
+        return None
+
+    def _weight_vector(self, weights, index):
+        vector = np.zeros(len(index), dtype=np.float32)
+        for name, weight in weights.items():
+            if name in index:
+                vector[index[name]] = weight
+        peak = vector.max() if len(vector) else 0.0
+        return vector / peak if peak > 0 else vector
+
+    def score(self, preferences):
+        """Score every product for this profile"""
+        scores = RATING_WEIGHT * self.rating_scores
+
+        if preferences:
+            category_weights = self._weight_vector(preferences.get('categories', {}), self.category_index)
+            brand_weights = self._weight_vector(preferences.get('brands', {}), self.brand_index)
+            use_case_weights = self._weight_vector(preferences.get('use_cases', {}), self.use_case_index)
+
+            affinity = (
+                category_weights[self.category_ids]
+                + brand_weights[self.brand_ids]
+                + (self.use_case_matrix @ use_case_weights) / self.use_case_counts
+            ) / 3.0
+            scores = scores + AFFINITY_WEIGHT * affinity
+
+            target_price = preferences.get('price')
+            if target_price:
+                distance = (self.log_prices - math.log(target_price)) / PRICE_TOLERANCE
+                scores = scores + PRICE_WEIGHT * np.exp(-0.5 * distance * distance)
+
+        return scores
+
+    def top_k(self, preferences, k=4):
+        """Return the k best products for this profile, best first"""
+        if not self.products or k <= 0:
+            return []
+
+        scores = self.score(preferences)
+        k = min(k, len(scores))
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        ranked = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [self.products[i] for i in ranked]
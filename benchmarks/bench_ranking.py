@@ -0,0 +1,108 @@
+"""Benchmark personalized ranking on a synthetic catalog
+
+Compares CatalogRanker (vectorized scoring + argpartition top-k) against the
+equivalent pure-Python score-then-sort loop.
+
+    python benchmarks/bench_ranking.py --items 100000
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import ranking  # noqa: E402
+from ranking import CatalogRanker, new_preferences, update_preferences  # noqa: E402
+
+CATEGORIES = ['laptop', 'smartphone', 'tablet', 'monitor', 'headphones']
+BRANDS = ['Dell', 'Apple', 'ASUS', 'Samsung', 'Google', 'Lenovo', 'HP', 'Sony', 'LG', 'Acer']
+USE_CASES = ['work', 'productivity', 'travel', 'creative', 'gaming', 'streaming',
+             'photography', 'communication', 'entertainment', 'content creation']
+
+
+def make_catalog(n, seed=42):
+    rng = random.Random(seed)
+    return [
+        {
+            'id': f'item_{i}',
+            'name': f'Item {i}',
+            'category': rng.choice(CATEGORIES),
+            'brand': rng.choice(BRANDS),
+            'price': round(rng.uniform(100, 3000), 2),
+            'rating': round(rng.uniform(3.0, 5.0), 1),
+            'features': '',
+            'use_cases': rng.sample(USE_CASES, rng.randint(1, 3))
+        }
+        for i in range(n)
+    ]
+
+
+def python_top_k(products, preferences, k):
+    """Reference implementation: score each product in Python, then full sort"""
+    def normalized(weights):
+        peak = max(weights.values(), default=0.0)
+        return {name.lower(): w / peak for name, w in weights.items()} if peak > 0 else {}
+
+    categories = normalized(preferences['categories'])
+    brands = normalized(preferences['brands'])
+    use_cases = normalized(preferences['use_cases'])
+    log_target = math.log(preferences['price']) if preferences['price'] else None
+
+    def score(p):
+        s = ranking.RATING_WEIGHT * p['rating'] / 5.0
+        uc = sum(use_cases.get(u.lower(), 0.0) for u in p['use_cases']) / max(len(p['use_cases']), 1)
+        affinity = (categories.get(p['category'], 0.0) + brands.get(p['brand'].lower(), 0.0) + uc) / 3.0
+        s += ranking.AFFINITY_WEIGHT * affinity
+        if log_target is not None:
+            d = (math.log(max(p['price'], 1.0)) - log_target) / ranking.PRICE_TOLERANCE
+            s += ranking.PRICE_WEIGHT * math.exp(-0.5 * d * d)
+        return s
+
+    return sorted(products, key=score, reverse=True)[:k]
+
+
+def timeit(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=100_000)
+    parser.add_argument('--k', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    products = make_catalog(args.items)
+
+    start = time.perf_counter()
+    ranker = CatalogRanker(products)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    preferences = new_preferences()
+    for message in ['Looking for a gaming laptop under $1500', 'Something from ASUS or Dell for streaming']:
+        update_preferences(preferences, ranker.extract_signals(message))
+
+    vectorized = [p['id'] for p in ranker.top_k(preferences, args.k)]
+    reference = [p['id'] for p in python_top_k(products, preferences, args.k)]
+
+    vector_ms = timeit(lambda: ranker.top_k(preferences, args.k), args.repeat)
+    python_ms = timeit(lambda: python_top_k(products, preferences, args.k), args.repeat)
+
+    print(f"catalog items:        {args.items:,}")
+    print(f"ranker build (once):  {build_ms:8.2f} ms")
+    print(f"vectorized top-{args.k}:     {vector_ms:8.2f} ms")
+    print(f"python score + sort:  {python_ms:8.2f} ms")
+    print(f"speedup:              {python_ms / vector_ms:8.1f}x")
+    print(f"same top-{args.k}:          {vectorized == reference}")
+
+
+if __name__ == '__main__':
+    main()
@@ -63,6 +63,11 @@ resource "azurerm_linux_web_app" "main" {
       python_version = "3.9"
     }
     always_on = true
+    
+    # One process with 8 gthread threads: sessions live in process memory (guarded by
+    # TechMartBot.sessions_lock), and a long request such as /api/admin/profile
+    # doesn't block the whole worker
+    app_command_line = "gunicorn --bind=0.0.0.0:8000 --timeout 600 --worker-class gthread --threads 8 app:app"
   }
 
   # 🔥 AUTOMATIC CONFIGURATION - All Azure services auto-configured!
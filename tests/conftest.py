@@ -0,0 +1,27 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# The app runs from inside app/ (flat modules), so make them importable the same way
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app')))
+
+from bot_handler import TechMartBot  # noqa: E402
+
+
+@pytest.fixture
+def bot():
+    config = SimpleNamespace(
+        AZURE_OPENAI_ENDPOINT=None,
+        AZURE_OPENAI_KEY=None,
+        AZURE_OPENAI_DEPLOYMENT='gpt-4',
+        AZURE_SPEECH_KEY=None,
+        AZURE_SPEECH_REGION=None,
+        AZURE_CV_ENDPOINT=None,
+        AZURE_CV_KEY=None,
+        MAX_IMAGE_WORKERS=4,
+        MAX_IMAGES_PER_REQUEST=10,
+        MAX_UPLOAD_MB=25
+    )
+    return TechMartBot(config)
@@ -0,0 +1,101 @@
+import pytest
+
+from comparison import parse_features
+
+
+@pytest.mark.parametrize('message, expected', [
+    ('Compare MacBook vs Dell XPS', ['laptop_002', 'laptop_001']),
+    ('iphone vs galaxy s24', ['phone_001', 'phone_002']),
+    ('is the ROG Strix G15 better than the M2?', ['laptop_003', 'laptop_002']),
+    ('Pixel 8 Pro or iPhone 15 Pro', ['phone_003', 'phone_001']),
+])
+def test_resolve_finds_named_products(bot, message, expected):
+    assert bot.comparison.resolve(message) == expected
+
+
+@pytest.mark.parametrize('message', [
+    'I need a gaming laptop with better performance for google docs',
+    "what's better for air travel?",
+    'any samsung or dell deals?',
+    'pro tips for an ultra long battery life',
+    'a 13 inch screen is fine',
+])
+def test_resolve_ignores_brands_and_everyday_words(bot, message):
+    assert bot.comparison.resolve(message) == []
+
+
+@pytest.mark.parametrize('message, intent', [
+    ('I need a gaming laptop with better performance for google docs', 'product_search'),
+    ('is the iphone better for photos?', 'product_search'),
+    ('is the iphone better than the pixel?', 'product_compare'),
+    ('Compare iPhone vs Samsung Galaxy', 'product_compare'),
+    ('Which is better, XPS or MacBook?', 'product_compare'),
+    ('hi, which laptop is good for work?', 'greeting'),
+    ('show me this phone', 'product_search'),
+])
+def test_comparison_intent_needs_explicit_comparison(bot, message, intent):
+    assert bot.analyze_intent(message)['intent'] == intent
+
+
+def test_everyday_words_do_not_render_a_product_comparison(bot):
+    response = bot.process_message('u', "what's better for air travel?")
+    assert 'MacBook Air M2 vs' not in response
+
+
+def test_parsed_spec_columns(bot):
+    specs = {pid: {k: v for k, v in spec.items() if k != 'extras'} for pid, spec in bot.comparison.specs.items()}
+
+    assert specs == {
+        'laptop_001': {'cpu': 'Intel Core i7-1355U', 'ram_gb': 16, 'storage_gb': 512,
+                       'display_in': 13.3, 'display_detail': '4K Display'},
+        'laptop_002': {'cpu': 'Apple M2', 'ram_gb': 8, 'storage_gb': 256,
+                       'display_in': 13.6, 'display_detail': 'Liquid Retina'},
+        'laptop_003': {'cpu': 'AMD Ryzen 7', 'gpu': 'RTX 4060', 'ram_gb': 16, 'storage_gb': 1024,
+                       'display_in': 15.6, 'display_detail': '144Hz'},
+        'phone_001': {'cpu': 'A17 Pro', 'storage_gb': 128, 'camera_mp': 48},
+        'phone_002': {'cpu': 'Snapdragon 8 Gen 3', 'storage_gb': 256, 'camera_mp': 200},
+        'phone_003': {'cpu': 'Google Tensor G3', 'storage_gb': 128},
+    }
+
+
+def test_unparsed_features_are_rendered(bot):
+    assert parse_features('Snapdragon 8 Gen 3, S Pen included')['extras'] == ['S Pen included']
+
+    response = bot.comparison.compare_message('compare iphone 15 pro vs galaxy s24 ultra')
+    assert '**✨ Also:** Titanium design | S Pen included' in response
+
+
+def test_rendered_comparisons_are_cached(bot):
+    first = bot.comparison.compare_message('compare xps vs macbook')
+    second = bot.comparison.compare_message('Dell XPS 13 versus MacBook Air M2')
+
+    assert first is second
+    assert bot.comparison.render_comparison.cache_info().hits == 1
+
+
+@pytest.mark.parametrize('message, found, unknown', [
+    ('compare iphone 15 vs iphone 14', ['phone_001'], ['iphone 14']),
+    ('Compare the MacBook Pro with the XPS', ['laptop_001'], ['MacBook Pro']),
+    ('compare iPhone 15 Pro Max vs Galaxy S24 Ultra', ['phone_002'], ['iPhone 15 Pro Max']),
+    ('compare galaxy s23 vs pixel 7', [], ['galaxy s23', 'pixel 7']),
+    ('compare galaxy s24 256gb vs pixel 8', ['phone_002', 'phone_003'], []),
+])
+def test_resolve_mentions_flags_models_we_do_not_stock(bot, message, found, unknown):
+    product_ids, unknown_models = bot.comparison.resolve_mentions(message)
+
+    assert product_ids == found
+    assert [name for name, _ in unknown_models] == unknown
+
+
+def test_unknown_model_is_reported_instead_of_substituted(bot):
+    response = bot.process_message('u', 'compare iphone 15 vs iphone 14')
+
+    assert '**Not in our catalog:** **iphone 14**' in response
+    assert 'Galaxy S24 Ultra**' not in response.split('Available')[0]
+    assert '🆚' not in response
+
+
+def test_single_named_product_still_gets_the_best_alternative(bot):
+    response = bot.comparison.compare_message('compare the xps')
+
+    assert response.startswith('🆚 **Dell XPS 13 (2024) vs MacBook Air M2**')
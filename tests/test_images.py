@@ -0,0 +1,139 @@
+import io
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import bot_handler
+
+
+class FakeVisionClient:
+    """Stands in for ComputerVisionClient: the image bytes name the tag to return"""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def analyze_image_in_stream(self, stream, visual_features):
+        tag = stream.read().decode()
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.delays.get(tag, 0.01))
+            if tag == 'broken':
+                raise RuntimeError('vision call failed')
+            return SimpleNamespace(
+                description=SimpleNamespace(captions=[SimpleNamespace(text=f'a {tag}')]),
+                tags=[SimpleNamespace(name=tag, confidence=0.9)]
+            )
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+@pytest.fixture
+def vision_bot(bot, monkeypatch):
+    monkeypatch.setattr(bot_handler, 'AZURE_SERVICES_AVAILABLE', True)
+    bot.cv_client = FakeVisionClient()
+    return bot
+
+
+def test_results_stream_in_completion_order_with_bounded_parallelism(vision_bot):
+    vision_bot.config.MAX_IMAGE_WORKERS = 2
+    vision_bot.cv_client.delays = {'laptop': 0.2}
+    images = [('a.jpg', b'laptop'), ('b.jpg', b'phone'), ('c.jpg', b'tablet'), ('d.jpg', b'monitor')]
+
+    results = list(vision_bot.iter_image_results(images))
+
+    assert results[-1]['filename'] == 'a.jpg'
+    assert sorted(r['index'] for r in results) == [0, 1, 2, 3]
+    assert vision_bot.cv_client.max_running == 2
+
+
+def test_partial_failure_keeps_other_results(vision_bot):
+    images = [('a.jpg', b'laptop'), ('b.jpg', b'broken'), ('c.jpg', b'phone')]
+
+    result = vision_bot.process_images('u', images)
+
+    assert [r['index'] for r in result['results']] == [0, 1, 2]
+    assert [r['success'] for r in result['results']] == [True, False, True]
+    assert result['analyzed'] == 2
+    assert result['failed'] == 1
+    assert result['detected_tech'] == ['laptop', 'phone']
+    assert 'Analyzed 2 Images!' in result['response']
+    assert '1 image was not analyzed' in result['response']
+
+
+def test_single_image_summary_is_singular(vision_bot):
+    result = vision_bot.process_images('u', [('a.jpg', b'laptop')])
+
+    assert 'Analyzed 1 Image!' in result['response']
+    assert 'not analyzed' not in result['response']
+
+
+def test_analysis_is_recorded_in_session(vision_bot):
+    vision_bot.process_images('u', [('a.jpg', b'laptop')])
+
+    session = vision_bot.user_sessions['u']
+    assert session['conversation_history'][0]['user'] == '[Uploaded 1 image]'
+    assert session['preferences']['categories'] == {'laptop': 1.0}
+
+
+@pytest.fixture
+def client(vision_bot, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'bot', vision_bot)
+    monkeypatch.setattr(app_module, 'config', vision_bot.config)
+    return app_module.app.test_client()
+
+
+def upload(client, files, query=''):
+    data = {'user_id': 'u', 'images': [(io.BytesIO(body), name) for name, body in files]}
+    return client.post(f'/api/images{query}', data=data, content_type='multipart/form-data')
+
+
+def test_stream_ends_with_summary(client):
+    response = upload(client, [('a.jpg', b'laptop'), ('b.jpg', b'phone')], '?stream=true')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert [line['type'] for line in lines] == ['image', 'image', 'summary']
+    assert lines[-1]['analyzed'] == 2
+
+
+def test_stream_ends_with_error_line_when_summary_fails(client, vision_bot, monkeypatch):
+    def broken_summary(user_id, results):
+        raise RuntimeError('boom')
+    monkeypatch.setattr(vision_bot, 'summarize_image_results', broken_summary)
+
+    response = upload(client, [('a.jpg', b'laptop')], '?stream=true')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert lines[-1]['type'] == 'error'
+    assert lines[-1]['success'] is False
+
+
+def test_disconnect_mid_stream_still_records_session(client, vision_bot):
+    data = {'user_id': 'u', 'images': [(io.BytesIO(b'laptop'), 'a.jpg'), (io.BytesIO(b'phone'), 'b.jpg')]}
+    response = client.post('/api/images?stream=true', data=data,
+                           content_type='multipart/form-data', buffered=False)
+    next(iter(response.response))
+    response.close()
+
+    assert vision_bot.user_sessions['u']['conversation_history'][0]['user'] == '[Uploaded 1 image]'
+
+
+def test_oversized_upload_is_rejected(client):
+    import app as app_module
+    app_module.app.config['MAX_CONTENT_LENGTH'] = 1024
+    try:
+        response = upload(client, [('a.jpg', b'x' * 4096)])
+    finally:
+        app_module.app.config['MAX_CONTENT_LENGTH'] = None
+
+    assert response.status_code == 413
+    assert response.get_json()['success'] is False
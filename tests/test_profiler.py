@@ -0,0 +1,137 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from profiler import UNTAGGED_ROUTE, ProfileRun, ProfilerBusyError, SamplingProfiler
+
+
+def burn_cpu(seconds):
+    deadline = time.thread_time() + seconds
+    while time.thread_time() < deadline:
+        pass
+
+
+def run_profile(profiler, seconds, interval=0.002):
+    """Run a blocking profile on a background thread, returning (thread, result holder)"""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(report=profiler.profile(seconds, interval)))
+    thread.start()
+    while not profiler.active:
+        time.sleep(0.001)
+    return thread, result
+
+
+def test_closed_run_ignores_late_writes_and_returns_a_stable_snapshot():
+    run = ProfileRun()
+    run.add_request('GET /a', wall_ms=10.0, cpu_ms=4.0)
+    run.add_samples([('GET /a', 'GET /a;app.py:f')])
+
+    route_stats, stacks, ticks = run.close()
+    run.add_request('GET /late', wall_ms=1.0, cpu_ms=1.0)
+    run.add_samples([('GET /a', 'GET /a;app.py:f')])
+    run.add_cpu('GET /a', 100.0)
+
+    assert route_stats == {'GET /a': {'requests': 1, 'wall_ms': 10.0, 'cpu_ms': 4.0, 'samples': 1}}
+    assert stacks == {'GET /a;app.py:f': 1}
+    assert ticks == 1
+    assert 'GET /late' not in run.route_stats
+
+
+def test_propagate_is_a_no_op_when_idle():
+    profiler = SamplingProfiler()
+    assert profiler.propagate(burn_cpu) is burn_cpu
+
+
+def test_propagate_attributes_pool_work_to_the_route():
+    profiler = SamplingProfiler()
+    thread, result = run_profile(profiler, 0.5)
+
+    token = profiler.request_started('POST /api/images')
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(profiler.propagate(burn_cpu), [0.1, 0.1]))
+    profiler.request_finished(token)
+    thread.join()
+
+    route = result['report']['routes']['POST /api/images']
+    assert route['requests'] == 1
+    assert route['cpu_ms'] >= 150
+    assert 'test_profiler.py:burn_cpu' in result['report']['collapsed']
+
+
+def test_busy_untagged_threads_are_sampled(bot):
+    profiler = SamplingProfiler()
+    stop = threading.Event()
+
+    def in_flight_request():
+        # Started before the profile, so it never gets a route tag
+        while not stop.is_set():
+            bot.ranker.top_k({'categories': {'laptop': 1.0}})
+
+    worker = threading.Thread(target=in_flight_request)
+    worker.start()
+    try:
+        thread, result = run_profile(profiler, 0.2)
+        thread.join()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert result['report']['routes'][UNTAGGED_ROUTE]['samples'] > 0
+    assert 'ranking.py:top_k' in result['report']['collapsed']
+
+
+def test_second_profile_is_rejected_while_one_runs():
+    profiler = SamplingProfiler()
+    thread, _ = run_profile(profiler, 0.1)
+    with pytest.raises(ProfilerBusyError):
+        profiler.profile(0.1)
+    thread.join()
+
+
+@pytest.fixture
+def admin_client(bot, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'bot', bot)
+    monkeypatch.setattr(app_module, 'config', SimpleNamespace(ADMIN_TOKEN='s3cret', PROFILER_MAX_SECONDS=5.0))
+    return app_module.app.test_client()
+
+
+def test_admin_profile_is_hidden_without_a_token(admin_client, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module.config, 'ADMIN_TOKEN', None)
+
+    assert admin_client.post('/api/admin/profile').status_code == 404
+
+
+@pytest.mark.parametrize('token', ['', 'wrong', 'é'])
+def test_admin_profile_rejects_bad_tokens(admin_client, token):
+    response = admin_client.post('/api/admin/profile', headers={'X-Admin-Token': token})
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize('query', ['seconds=abc', 'seconds=0', 'seconds=10', 'interval_ms=0'])
+def test_admin_profile_validates_arguments(admin_client, query):
+    response = admin_client.post(f'/api/admin/profile?{query}', headers={'X-Admin-Token': 's3cret'})
+    assert response.status_code == 400
+
+
+def test_admin_profile_returns_409_when_busy(admin_client):
+    from profiler import profiler
+
+    profiler._lock.acquire()
+    try:
+        response = admin_client.post('/api/admin/profile?seconds=0.1', headers={'X-Admin-Token': 's3cret'})
+    finally:
+        profiler._lock.release()
+
+    assert response.status_code == 409
+
+
+def test_admin_profile_returns_a_report(admin_client):
+    response = admin_client.post('/api/admin/profile?seconds=0.05', headers={'X-Admin-Token': 's3cret'})
+
+    assert response.status_code == 200
+    assert {'routes', 'collapsed', 'total_samples'} <= set(response.get_json())
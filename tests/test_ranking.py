@@ -0,0 +1,81 @@
+import random
+
+import numpy as np
+import pytest
+
+from ranking import PREFERENCE_DECAY, CatalogRanker, new_preferences, update_preferences
+
+
+@pytest.mark.parametrize('message, price', [
+    ('laptop under $1500', 1500.0),
+    ('laptop under 1,200 dollars', 1200.0),
+    ('budget of 800', 800.0),
+    ('less than 700 please', 700.0),
+    ('around $900', 900.0),
+    ('around 1.2k', 1200.0),
+    ('$999', 999.0),
+])
+def test_extract_price_reads_budgets(bot, message, price):
+    assert bot.ranker.extract_price(message) == price
+
+
+@pytest.mark.parametrize('message', [
+    'phone with around 128GB storage',
+    'any samsung phone with max 256GB?',
+    'max 15.6 inch screen',
+    'a phone under 200 grams',
+    'under 300 g if possible',
+    'battery over 5000mAh, under 100 hours of charging',
+    'a laptop under 2 kg and below 150 W',
+    'something around 1000',
+])
+def test_extract_price_ignores_specs_and_unmarked_generic_numbers(bot, message):
+    assert bot.ranker.extract_price(message) is None
+
+
+def test_update_preferences_decays_older_signals():
+    preferences = new_preferences()
+    update_preferences(preferences, {'categories': ['laptop'], 'brands': ['dell'], 'use_cases': [], 'price': 1000.0})
+    update_preferences(preferences, {'categories': ['smartphone'], 'brands': [], 'use_cases': [], 'price': 600.0})
+
+    assert preferences['categories'] == {'laptop': PREFERENCE_DECAY, 'smartphone': 1.0}
+    assert preferences['brands'] == {'dell': PREFERENCE_DECAY}
+    assert preferences['price'] == 800.0
+    assert preferences['updates'] == 2
+
+
+def test_update_preferences_ignores_messages_without_signals():
+    preferences = new_preferences()
+    update_preferences(preferences, {'categories': [], 'brands': [], 'use_cases': [], 'price': None})
+
+    assert preferences == new_preferences()
+
+
+def test_personalized_top_k_follows_the_profile(bot):
+    preferences = new_preferences()
+    update_preferences(preferences, bot.ranker.extract_signals('an apple phone for photography under $1000'))
+
+    assert [p['id'] for p in bot.ranker.top_k(preferences, k=2)] == ['phone_001', 'phone_003']
+
+
+@pytest.mark.parametrize('k', [1, 4, 25, 1000])
+def test_top_k_matches_a_full_sort(k):
+    rng = random.Random(7)
+    products = [
+        {
+            'id': f'item_{i}',
+            'category': rng.choice(['laptop', 'smartphone', 'tablet']),
+            'brand': rng.choice(['Dell', 'Apple', 'Samsung', 'Google']),
+            'price': rng.uniform(100, 3000),
+            'rating': rng.uniform(3.0, 5.0),
+            'use_cases': rng.sample(['work', 'gaming', 'photography', 'travel'], 2)
+        }
+        for i in range(500)
+    ]
+    ranker = CatalogRanker(products)
+    preferences = {'categories': {'laptop': 1.0}, 'brands': {'dell': 0.5}, 'use_cases': {'gaming': 1.0}, 'price': 1200.0}
+
+    scores = ranker.score(preferences)
+    expected = [products[i]['id'] for i in np.argsort(-scores, kind='stable')[:k]]
+
+    assert [p['id'] for p in ranker.top_k(preferences, k=k)] == expected
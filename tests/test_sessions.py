@@ -0,0 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_concurrent_messages_share_one_session(bot):
+    messages = [f'show me a gaming laptop under ${1000 + i}' for i in range(200)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda message: bot.process_message('u', message), messages))
+
+    session = bot.user_sessions['u']
+    assert len(bot.user_sessions) == 1
+    assert len(session['conversation_history']) == 2 * len(messages)
+    assert session['preferences']['updates'] == len(messages)
+
+
+def test_recommendations_read_a_preference_snapshot(bot):
+    bot.process_message('u', 'an apple phone for photography')
+
+    snapshot = bot.get_preferences('u')
+    snapshot['brands']['samsung'] = 5.0
+
+    assert 'samsung' not in bot.user_sessions['u']['preferences']['brands']
+    assert bot.get_preferences('nobody') is None